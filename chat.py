@@ -11,14 +11,30 @@ SECURITY FEATURES:
 - Query validation: All user-generated SQL is validated before execution
 """
 
+import hashlib
 import os
+import queue
+import re
 import sys
+import threading
+import time
 import uuid
+from collections import OrderedDict, deque
+from contextlib import contextmanager
 from datetime import datetime
-from typing import List, Dict, Optional, Tuple
+from typing import Callable, Iterator, List, Dict, Optional, Tuple
 
-import psycopg2
-from psycopg2.extras import RealDictCursor
+from dotenv import load_dotenv
+
+# Load environment variables first so EMBED_THREADS can come from .env
+load_dotenv()
+
+# Pin the OpenMP pool size before torch/onnxruntime are imported; their
+# defaults can badly under- or over-subscribe CPU cores
+os.environ.setdefault("OMP_NUM_THREADS", os.getenv("EMBED_THREADS", str(os.cpu_count() or 1)))
+
+from psycopg2.extras import execute_values
+from psycopg2.pool import ThreadedConnectionPool
 from openai import OpenAI
 from sentence_transformers import SentenceTransformer
 import numpy as np
@@ -28,10 +44,8 @@ from rich.panel import Panel
 from rich.table import Table
 from prompt_toolkit import prompt
 from prompt_toolkit.history import InMemoryHistory
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+from validation import validate_read_only_query
 
 # Initialize console for rich output
 console = Console()
@@ -44,99 +58,189 @@ POSTGRES_PASSWORD = os.getenv("POSTGRES_PASSWORD", "cgipass")
 POSTGRES_DB = os.getenv("POSTGRES_DB", "cgidb")
 LLAMA_API_URL = os.getenv("LLAMA_API_URL", "http://localhost:8080")
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "onnx")  # onnx, openvino or torch
+EMBEDDING_ONNX_FILE = os.getenv("EMBEDDING_ONNX_FILE")  # e.g. onnx/model_qint8_avx512.onnx
+EMBED_THREADS = int(os.getenv("EMBED_THREADS", str(os.cpu_count() or 1)))
+DB_POOL_MIN = int(os.getenv("DB_POOL_MIN", "2"))
+DB_POOL_MAX = int(os.getenv("DB_POOL_MAX", "8"))
+HNSW_EF_SEARCH = int(os.getenv("HNSW_EF_SEARCH", "40"))
+VECTOR_INDEX_NAME = "documents_embedding_ip_hnsw"
+SQL_DISPLAY_ROWS = int(os.getenv("SQL_DISPLAY_ROWS", "50"))
+SQL_CACHE_SIZE = int(os.getenv("SQL_CACHE_SIZE", "256"))
+SCHEMA_CACHE_TTL = int(os.getenv("SCHEMA_CACHE_TTL", "300"))  # seconds
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "64"))
+EMBEDDING_UPDATE_PAGE_SIZE = int(os.getenv("EMBEDDING_UPDATE_PAGE_SIZE", "1000"))
+SEMANTIC_CACHE_THRESHOLD = float(os.getenv("SEMANTIC_CACHE_THRESHOLD", "0.92"))
+SEMANTIC_CACHE_SIZE = int(os.getenv("SEMANTIC_CACHE_SIZE", "512"))
+
+# llama.cpp-specific request options: reuse the KV cache for the longest
+# common prompt prefix with the previous request on the same slot
+LLAMA_EXTRA_BODY = {"cache_prompt": True}
+# Optional llama.cpp slot reserved for /ask so its document prefixes stay
+# cached between questions (needs the server started with --parallel > 1)
+LLAMA_RAG_SLOT = int(os.environ["LLAMA_RAG_SLOT"]) if os.getenv("LLAMA_RAG_SLOT") else None
+
+# Heuristic for routing un-prefixed input to SQL mode
+_SQL_HINT_RE = re.compile(
+    r'\b(show|list|how many|count|total|find|get|customers|products|orders)\b',
+    re.IGNORECASE
+)
 
 # Session ID for chat history
 SESSION_ID = str(uuid.uuid4())
+# Most recent messages kept in memory for prompts and /history
+CHAT_HISTORY_WINDOW = 20
+
+
+def _best_match(matrix: np.ndarray, query_vec: np.ndarray) -> Tuple[int, float]:
+    """Row of matrix with the highest dot product with query_vec"""
+    sims = matrix @ query_vec
+    best = int(np.argmax(sims))
+    return best, float(sims[best])
+
+
+def _normalize_question(question: str) -> str:
+    """Collapse whitespace; case is kept since it can matter for string literals"""
+    return " ".join(question.split())
+
+
+def to_vector_literal(vec) -> str:
+    """Format a sequence of floats in pgvector's text input format (vector/halfvec)"""
+    return "[" + ",".join(map(str, vec)) + "]"
 
 
 class DatabaseManager:
     """Manages PostgreSQL database connections and operations"""
 
     def __init__(self):
-        self.conn = None
+        self.pool: Optional[ThreadedConnectionPool] = None
         self.embedding_model = None
+        self._schema_cache: Optional[str] = None
+        self._schema_cache_ts: float = 0.0
+        # Chat messages are written by a background thread so the INSERT
+        # does not sit on the critical path of each turn
+        self._write_q: "queue.Queue[Optional[Tuple[str, str, str]]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        # The last CHAT_HISTORY_WINDOW messages of this session, oldest first,
+        # so history reads never wait on the writer thread
+        self._session_messages: "deque[Tuple[str, str, datetime]]" = deque(maxlen=CHAT_HISTORY_WINDOW)
 
     def connect(self):
-        """Establish connection to PostgreSQL"""
+        """Establish a pool of connections to PostgreSQL"""
         try:
-            self.conn = psycopg2.connect(
+            self.pool = ThreadedConnectionPool(
+                minconn=DB_POOL_MIN,
+                maxconn=DB_POOL_MAX,
                 host=POSTGRES_HOST,
                 port=POSTGRES_PORT,
                 user=POSTGRES_USER,
                 password=POSTGRES_PASSWORD,
-                database=POSTGRES_DB
+                database=POSTGRES_DB,
+                # Candidate list size for HNSW index scans on every pooled connection
+                options=f"-c hnsw.ef_search={HNSW_EF_SEARCH}"
             )
+            self.ensure_vector_index()
+            self._writer = threading.Thread(target=self._chat_writer, daemon=True)
+            self._writer.start()
             console.print("[green]✓ Connected to PostgreSQL[/green]")
             return True
         except Exception as e:
             console.print(f"[red]✗ Database connection failed: {e}[/red]")
             return False
 
+    def ensure_vector_index(self):
+        """Create the HNSW index on documents.embedding if it is missing"""
+        # Plain catalog read first: the usual case (index already built by
+        # init.sql or an earlier run) then needs no DDL, no lock on documents
+        # and no table ownership, so the read-only user starts cleanly
+        exists = self._execute_tuples(
+            "SELECT 1 FROM pg_indexes WHERE tablename = 'documents' AND indexname = %s",
+            (VECTOR_INDEX_NAME,)
+        )
+        if exists:
+            return
+
+        query = f"""
+        CREATE INDEX IF NOT EXISTS {VECTOR_INDEX_NAME} ON documents
+        USING hnsw (embedding halfvec_ip_ops) WITH (m = 16, ef_construction = 64)
+        """
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                conn.commit()
+            except Exception as e:
+                # e.g. connected as the read-only user; search still works without it
+                conn.rollback()
+                console.print(f"[yellow]⚠️  Could not ensure vector index: {e}[/yellow]")
+
+    @contextmanager
+    def connection(self):
+        """Borrow a connection from the pool for the duration of a block"""
+        conn = self.pool.getconn()
+        try:
+            yield conn
+        finally:
+            self.pool.putconn(conn)
+
     def validate_read_only_query(self, query: str) -> bool:
         """
         Validate that a query is read-only (SELECT only).
         Returns True if valid, raises Exception if not.
         """
-        import re
-        
-        # Remove comments and normalize whitespace
-        clean_query = ' '.join(query.split())
-        clean_query = clean_query.upper().strip()
-        
-        # Remove leading/trailing whitespace and semicolons
-        clean_query = clean_query.strip('; ')
-        
-        # Block any write operations (use word boundaries to avoid false positives)
-        forbidden_keywords = [
-            'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER',
-            'TRUNCATE', 'REPLACE', 'MERGE', 'GRANT', 'REVOKE',
-            'EXECUTE', 'EXEC', 'CALL', 'DO'
-        ]
-        
-        for keyword in forbidden_keywords:
-            # Use word boundary regex to match whole words only (e.g., "DO" but not "DOCUMENTS")
-            pattern = r'\b' + re.escape(keyword) + r'\b'
-            if re.search(pattern, clean_query):
-                raise Exception(f"🛡️ SECURITY: {keyword} operations are not allowed. Read-only mode is enforced.")
-        
-        # Ensure query starts with SELECT or WITH (for CTEs)
-        if not (clean_query.startswith('SELECT') or clean_query.startswith('WITH')):
-            raise Exception("🛡️ SECURITY: Only SELECT queries are allowed in read-only mode.")
-        
-        # Additional check: look for semicolons that might indicate multiple statements
-        # Allow only trailing semicolons, not mid-query ones
-        semicolon_count = query.count(';')
-        if semicolon_count > 1 or (semicolon_count == 1 and not query.strip().endswith(';')):
-            raise Exception("🛡️ SECURITY: Multiple statements or inline semicolons are not allowed.")
-        
-        return True
+        return validate_read_only_query(query)
 
-    def execute_query(self, query: str, params: Optional[tuple] = None) -> List[Dict]:
-        """Execute a SQL query and return results (READ-ONLY MODE)"""
-        # For user-generated queries, validate they are read-only
-        # Internal queries (with params) for chat history management are allowed
-        if params is None or 'INSERT' not in query.upper():
-            # This is a user query - validate it
-            if not (query.upper().strip().startswith('INSERT INTO CHAT_HISTORY') or 
-                    query.upper().strip().startswith('SELECT') and 'CHAT_HISTORY' in query.upper() or
-                    query.upper().strip().startswith('UPDATE DOCUMENTS')):
-                # Only validate non-internal queries
-                self.validate_read_only_query(query)
-        
-        try:
-            with self.conn.cursor(cursor_factory=RealDictCursor) as cur:
-                cur.execute(query, params)
-                if cur.description:  # SELECT query
-                    return [dict(row) for row in cur.fetchall()]
-                else:  # INSERT/UPDATE/DELETE (only for internal operations)
-                    self.conn.commit()
-                    return [{"affected_rows": cur.rowcount}]
-        except Exception as e:
-            self.conn.rollback()
-            raise Exception(f"Query execution failed: {str(e)}")
+    def execute_user_query(self, query: str,
+                           max_rows: int) -> Tuple[List[str], List[tuple], int]:
+        """
+        Validate and execute a user-supplied SELECT query for display.
+        Returns (column names, up to max_rows row tuples, total row count).
+        """
+        self.validate_read_only_query(query)
+
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query)
+                    if not cur.description:
+                        results = ([], [], 0)
+                    else:
+                        columns = [col.name for col in cur.description]
+                        results = (columns, cur.fetchmany(max_rows), cur.rowcount)
+                conn.commit()
+                return results
+            except Exception as e:
+                conn.rollback()
+                raise Exception(f"Query execution failed: {str(e)}")
+
+    def _execute_tuples(self, query: str, params: Optional[tuple] = None) -> List[tuple]:
+        """
+        Execute a trusted internal query and return plain row tuples.
+        Skips read-only validation and per-row dict building; callers map
+        columns by position.
+        """
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    cur.execute(query, params)
+                    results = cur.fetchall() if cur.description else []
+                conn.commit()
+                return results
+            except Exception as e:
+                conn.rollback()
+                raise Exception(f"Query execution failed: {str(e)}")
+
+    def invalidate_schema_cache(self):
+        """Drop the cached schema so the next lookup hits the database"""
+        self._schema_cache = None
+        self._schema_cache_ts = 0.0
 
     def get_schema_info(self) -> str:
-        """Get database schema information"""
+        """Get database schema information (cached for SCHEMA_CACHE_TTL seconds)"""
+        if (self._schema_cache is not None
+                and time.monotonic() - self._schema_cache_ts < SCHEMA_CACHE_TTL):
+            return self._schema_cache
+
         query = """
         SELECT
             table_name,
@@ -147,64 +251,118 @@ class DatabaseManager:
         WHERE table_schema = 'public'
         ORDER BY table_name, ordinal_position;
         """
-        results = self.execute_query(query)
+        results = self._execute_tuples(query)
 
-        schema_text = "Database Schema:\n\n"
+        parts = ["Database Schema:\n\n"]
         current_table = None
-        for row in results:
-            if row['table_name'] != current_table:
-                current_table = row['table_name']
-                schema_text += f"\nTable: {current_table}\n"
-            schema_text += f"  - {row['column_name']}: {row['data_type']}"
-            if row['is_nullable'] == 'NO':
-                schema_text += " (NOT NULL)"
-            schema_text += "\n"
-
+        for table_name, column_name, data_type, is_nullable in results:
+            if table_name != current_table:
+                current_table = table_name
+                parts.append(f"\nTable: {current_table}\n")
+            parts.append(f"  - {column_name}: {data_type}")
+            if is_nullable == 'NO':
+                parts.append(" (NOT NULL)")
+            parts.append("\n")
+        schema_text = "".join(parts)
+
+        self._schema_cache = schema_text
+        self._schema_cache_ts = time.monotonic()
         return schema_text
 
-    def save_chat_message(self, role: str, content: str):
-        """Save a chat message to history"""
+    def _insert_chat_message(self, session_id: str, role: str, content: str):
+        """Insert a single chat message row"""
         query = """
         INSERT INTO chat_history (session_id, role, content)
         VALUES (%s, %s, %s)
         """
-        self.execute_query(query, (SESSION_ID, role, content))
+        self._execute_tuples(query, (session_id, role, content))
 
-    def get_chat_history(self, limit: int = 10) -> List[Dict]:
-        """Retrieve recent chat history"""
-        query = """
-        SELECT role, content, timestamp
-        FROM chat_history
-        WHERE session_id = %s
-        ORDER BY timestamp DESC
-        LIMIT %s
-        """
-        results = self.execute_query(query, (SESSION_ID, limit))
-        return list(reversed(results))
+    def _chat_writer(self):
+        """Drain queued chat messages into chat_history (runs on a daemon thread)"""
+        while True:
+            item = self._write_q.get()
+            try:
+                if item is None:
+                    return
+                self._insert_chat_message(*item)
+            except Exception as e:
+                console.print(f"[red]✗ Failed to save chat message: {e}[/red]")
+            finally:
+                self._write_q.task_done()
+
+    def save_chat_message(self, role: str, content: str):
+        """Queue a chat message to be saved to history"""
+        self._session_messages.append((role, content, datetime.now()))
+        if self._writer is None:
+            self._insert_chat_message(SESSION_ID, role, content)
+        else:
+            self._write_q.put((SESSION_ID, role, content))
+
+    def get_chat_history(self, limit: int = 10) -> List[Tuple[str, str, datetime]]:
+        """Retrieve this session's recent chat history as (role, content, timestamp) tuples"""
+        return list(self._session_messages)[-limit:] if limit > 0 else []
 
     def init_embedding_model(self):
         """Initialize the embedding model for RAG"""
         if self.embedding_model is None:
-            console.print(f"[yellow]Loading embedding model: {EMBEDDING_MODEL}...[/yellow]")
-            self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+            console.print(f"[yellow]Loading embedding model: {EMBEDDING_MODEL} ({EMBEDDING_BACKEND})...[/yellow]")
+            try:
+                import torch
+                torch.set_num_threads(EMBED_THREADS)
+            except ImportError:
+                pass
+            if EMBEDDING_BACKEND == "torch":
+                self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
+            else:
+                model_kwargs = {"file_name": EMBEDDING_ONNX_FILE} if EMBEDDING_ONNX_FILE else {}
+                if EMBEDDING_BACKEND == "onnx":
+                    try:
+                        import onnxruntime
+                        # ORT keeps its own thread pool; neither OMP_NUM_THREADS
+                        # nor torch.set_num_threads reaches it
+                        session_options = onnxruntime.SessionOptions()
+                        session_options.intra_op_num_threads = EMBED_THREADS
+                        model_kwargs["session_options"] = session_options
+                    except ImportError:
+                        pass
+                try:
+                    self.embedding_model = SentenceTransformer(
+                        EMBEDDING_MODEL, backend=EMBEDDING_BACKEND, model_kwargs=model_kwargs or None
+                    )
+                except Exception as e:
+                    # Missing optimum/onnxruntime or an older sentence-transformers
+                    console.print(f"[yellow]⚠️  {EMBEDDING_BACKEND} backend unavailable ({e}), using PyTorch[/yellow]")
+                    self.embedding_model = SentenceTransformer(EMBEDDING_MODEL)
             console.print("[green]✓ Embedding model loaded[/green]")
 
-    def search_documents(self, query: str, top_k: int = 3) -> List[Dict]:
-        """Search documents using vector similarity"""
-        self.init_embedding_model()
+    def search_documents(self, query: str, top_k: int = 3,
+                         query_embedding: Optional[List[float]] = None) -> List[tuple]:
+        """Search documents using vector similarity
+
+        Returns (id, content, metadata, similarity) tuples, best match first.
 
-        # Generate query embedding
-        query_embedding = self.embedding_model.encode(query).tolist()
+        Pass query_embedding when the caller has already encoded the query
+        to skip a second forward pass through the embedding model.
+        """
+        if query_embedding is None:
+            self.init_embedding_model()
+            query_embedding = self.embedding_model.encode(query, normalize_embeddings=True).tolist()
+
+        # Serialize the vector once in pgvector's text format and bind it a
+        # single time; the CTE is inlined so the ORDER BY still sees a constant
+        vec_literal = to_vector_literal(query_embedding)
 
-        # Search using cosine similarity
+        # Stored and query embeddings are unit-norm, so inner product equals
+        # cosine similarity without per-row normalization (<#> is negated)
         search_query = """
-        SELECT content, metadata, 1 - (embedding <=> %s::vector) AS similarity
-        FROM documents
+        WITH q AS (SELECT %s::halfvec AS v)
+        SELECT id, content, metadata, -(embedding <#> q.v) AS similarity
+        FROM documents, q
         WHERE embedding IS NOT NULL
-        ORDER BY embedding <=> %s::vector
+        ORDER BY embedding <#> q.v
         LIMIT %s
         """
-        return self.execute_query(search_query, (query_embedding, query_embedding, top_k))
+        return self._execute_tuples(search_query, (vec_literal, top_k))
 
     def embed_documents(self):
         """Generate embeddings for documents that don't have them"""
@@ -212,25 +370,55 @@ class DatabaseManager:
 
         # Get documents without embeddings
         query = "SELECT id, content FROM documents WHERE embedding IS NULL"
-        docs = self.execute_query(query)
+        docs = self._execute_tuples(query)
 
         if not docs:
             return
 
         console.print(f"[yellow]Generating embeddings for {len(docs)} documents...[/yellow]")
 
-        for doc in docs:
-            embedding = self.embedding_model.encode(doc['content']).tolist()
-            update_query = "UPDATE documents SET embedding = %s WHERE id = %s"
-            self.execute_query(update_query, (embedding, doc['id']))
+        # Sort by length so each batch pads to a similar sequence length
+        docs.sort(key=lambda doc: len(doc[1]))
+        embeddings = self.embedding_model.encode(
+            [content for _, content in docs],
+            batch_size=EMBEDDING_BATCH_SIZE,
+            show_progress_bar=False,
+            convert_to_numpy=True,
+            normalize_embeddings=True
+        )
+
+        # One cursor, one transaction; execute_values sends EMBEDDING_UPDATE_PAGE_SIZE
+        # rows per statement and the vectors travel as pgvector text literals
+        update_query = """
+        UPDATE documents AS d SET embedding = v.e
+        FROM (VALUES %s) AS v(id, e)
+        WHERE d.id = v.id
+        """
+        with self.connection() as conn:
+            try:
+                with conn.cursor() as cur:
+                    execute_values(
+                        cur,
+                        update_query,
+                        [(doc_id, to_vector_literal(emb)) for (doc_id, _), emb in zip(docs, embeddings)],
+                        template="(%s, %s::halfvec)",
+                        page_size=EMBEDDING_UPDATE_PAGE_SIZE
+                    )
+                conn.commit()
+            except Exception as e:
+                conn.rollback()
+                raise Exception(f"Query execution failed: {str(e)}")
 
-        self.conn.commit()
         console.print("[green]✓ Embeddings generated[/green]")
 
     def close(self):
-        """Close database connection"""
-        if self.conn:
-            self.conn.close()
+        """Flush pending chat messages and close all pooled database connections"""
+        if self._writer is not None:
+            self._write_q.put(None)
+            self._write_q.join()
+            self._writer = None
+        if self.pool:
+            self.pool.closeall()
 
 
 class LLMClient:
@@ -257,19 +445,46 @@ class LLMClient:
             console.print(f"[red]✗ LLM server connection failed: {e}[/red]")
             return False
 
-    def chat(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 1000) -> str:
+    @staticmethod
+    def _extra_body(slot: Optional[int]) -> Dict:
+        """llama.cpp request options, optionally pinned to a server slot"""
+        if slot is None:
+            return LLAMA_EXTRA_BODY
+        return {**LLAMA_EXTRA_BODY, "id_slot": slot}
+
+    def chat(self, messages: List[Dict[str, str]], temperature: float = 0.7, max_tokens: int = 1000,
+             slot: Optional[int] = None) -> str:
         """Send chat messages to LLM and get response"""
         try:
             response = self.client.chat.completions.create(
                 model="local-model",
                 messages=messages,
                 temperature=temperature,
-                max_tokens=max_tokens
+                max_tokens=max_tokens,
+                extra_body=self._extra_body(slot)
             )
             return response.choices[0].message.content
         except Exception as e:
             raise Exception(f"LLM request failed: {str(e)}")
 
+    def chat_stream(self, messages: List[Dict[str, str]], temperature: float = 0.7,
+                    max_tokens: int = 1000, slot: Optional[int] = None) -> Iterator[str]:
+        """Send chat messages to LLM and yield the response text as it is generated"""
+        try:
+            stream = self.client.chat.completions.create(
+                model="local-model",
+                messages=messages,
+                temperature=temperature,
+                max_tokens=max_tokens,
+                stream=True,
+                extra_body=self._extra_body(slot)
+            )
+            for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        except Exception as e:
+            raise Exception(f"LLM request failed: {str(e)}")
+
 
 class ChatInterface:
     """Main chat interface combining SQL generation, RAG, and conversation"""
@@ -278,6 +493,16 @@ class ChatInterface:
         self.db = DatabaseManager()
         self.llm = LLMClient()
         self.history = InMemoryHistory()
+        # Semantic cache for RAG answers: row i of a fixed-size matrix is the
+        # unit-norm embedding of the question that produced answer i, and
+        # stamp i records when the row was last used (0 = never)
+        self._sem_cache_vecs: Optional[np.ndarray] = None
+        self._sem_cache_stamps = np.zeros(max(SEMANTIC_CACHE_SIZE, 0), dtype=np.int64)
+        self._sem_cache_answers: List[Optional[str]] = [None] * max(SEMANTIC_CACHE_SIZE, 0)
+        self._sem_cache_count = 0
+        self._sem_cache_clock = 0
+        # Generated SQL keyed by (normalized question, schema hash), oldest first
+        self._sql_cache: "OrderedDict[Tuple[str, str], str]" = OrderedDict()
 
     def initialize(self) -> bool:
         """Initialize all components"""
@@ -299,11 +524,41 @@ class ChatInterface:
         console.print("[green]✓ Write operations blocked (SELECT only)[/green]\n")
         return True
 
-    def generate_sql_query(self, user_question: str) -> Tuple[str, str]:
-        """Generate SQL query from natural language (READ-ONLY)"""
-        schema = self.db.get_schema_info()
+    def generate_sql_query(self, user_question: str) -> str:
+        """Generate SQL query from natural language (READ-ONLY)
 
-        prompt = f"""You are a SQL expert. Given the following database schema and user question, generate a valid PostgreSQL query.
+        Repeated questions against an unchanged schema are served from an
+        LRU cache without calling the LLM.
+        """
+        schema = self.db.get_schema_info()
+        schema_hash = hashlib.blake2b(schema.encode(), digest_size=8).hexdigest()
+        question = _normalize_question(user_question)
+        key = (question, schema_hash)
+
+        cached = self._sql_cache.get(key)
+        if cached is not None:
+            self._sql_cache.move_to_end(key)
+            return cached
+
+        sql_query = self._generate_sql(question, schema)
+        self._sql_cache[key] = sql_query
+        if len(self._sql_cache) > SQL_CACHE_SIZE:
+            self._sql_cache.popitem(last=False)
+        return sql_query
+
+    def forget_sql_query(self, user_question: str):
+        """Drop cached SQL for a question so the next ask regenerates it"""
+        question = _normalize_question(user_question)
+        for key in [key for key in self._sql_cache if key[0] == question]:
+            del self._sql_cache[key]
+
+    def _generate_sql(self, user_question: str, schema: str) -> str:
+        """Ask the LLM for a SQL query against the given schema text"""
+        # Everything except the question lives in the system message so the
+        # prompt prefix is identical across calls and llama.cpp can reuse its
+        # KV cache instead of re-processing the schema every time
+        system_prompt = f"""You are a helpful SQL expert assistant. You ONLY generate SELECT queries for security reasons.
+Given the following database schema and user question, generate a valid PostgreSQL query.
 
 IMPORTANT SECURITY CONSTRAINTS:
 - You may ONLY generate SELECT queries (read-only)
@@ -312,15 +567,13 @@ IMPORTANT SECURITY CONSTRAINTS:
 
 {schema}
 
-User Question: {user_question}
-
 Generate ONLY the SQL query, without any explanation or markdown formatting. The query should be ready to execute.
 If the request requires write operations, respond with: "ERROR: Only SELECT queries are allowed in read-only mode."
 """
 
         messages = [
-            {"role": "system", "content": "You are a helpful SQL expert assistant. You ONLY generate SELECT queries for security reasons."},
-            {"role": "user", "content": prompt}
+            {"role": "system", "content": system_prompt},
+            {"role": "user", "content": f"User Question: {user_question}"}
         ]
 
         sql_query = self.llm.chat(messages, temperature=0.2, max_tokens=500)
@@ -340,46 +593,106 @@ If the request requires write operations, respond with: "ERROR: Only SELECT quer
         
         return cleaned_query
 
-    def answer_with_rag(self, user_question: str) -> str:
-        """Answer question using RAG from documents"""
+    def _semantic_cache_lookup(self, query_vec: np.ndarray) -> Optional[str]:
+        """Return a cached answer for a near-duplicate question, if any"""
+        if not self._sem_cache_count:
+            return None
+
+        best, sim = _best_match(self._sem_cache_vecs[:self._sem_cache_count], query_vec)
+        if sim < SEMANTIC_CACHE_THRESHOLD:
+            return None
+
+        self._sem_cache_clock += 1
+        self._sem_cache_stamps[best] = self._sem_cache_clock
+        return self._sem_cache_answers[best]
+
+    def _semantic_cache_store(self, query_vec: np.ndarray, answer: str):
+        """Add an answer to the semantic cache, evicting the least recently used"""
+        if SEMANTIC_CACHE_SIZE <= 0:
+            return
+        if self._sem_cache_vecs is None:
+            self._sem_cache_vecs = np.empty((SEMANTIC_CACHE_SIZE, query_vec.shape[0]), dtype=np.float32)
+
+        # Fill free rows first, then overwrite the least recently used one
+        if self._sem_cache_count < SEMANTIC_CACHE_SIZE:
+            row = self._sem_cache_count
+            self._sem_cache_count += 1
+        else:
+            row = int(np.argmin(self._sem_cache_stamps))
+
+        self._sem_cache_vecs[row] = query_vec
+        self._sem_cache_answers[row] = answer
+        self._sem_cache_clock += 1
+        self._sem_cache_stamps[row] = self._sem_cache_clock
+
+    def answer_with_rag(self, user_question: str,
+                        on_token: Optional[Callable[[str], None]] = None) -> str:
+        """Answer question using RAG from documents
+
+        If on_token is given, the LLM answer is streamed and each text chunk
+        is passed to it as it arrives. Cached and fallback answers are only
+        returned, never streamed.
+        """
+        # Short-circuit paraphrases of recently answered questions
+        self.db.init_embedding_model()
+        query_vec = self.db.embedding_model.encode(
+            user_question, normalize_embeddings=True, convert_to_numpy=True
+        ).astype(np.float32)
+        cached = self._semantic_cache_lookup(query_vec)
+        if cached is not None:
+            return cached
+
         # Search for relevant documents
-        relevant_docs = self.db.search_documents(user_question, top_k=3)
+        relevant_docs = self.db.search_documents(
+            user_question, top_k=3, query_embedding=query_vec.tolist()
+        )
 
         if not relevant_docs:
             return "I couldn't find any relevant information in the knowledge base."
 
-        # Build context from documents
+        # Build context from documents in id order with id-based labels, so
+        # the same documents always produce the same prompt prefix and
+        # llama.cpp can reuse their KV cache across questions
         context = "\n\n".join([
-            f"Document {i+1}: {doc['content']}"
-            for i, doc in enumerate(relevant_docs)
+            f"Document {doc_id}: {content}"
+            for doc_id, content, _, _ in sorted(relevant_docs, key=lambda doc: doc[0])
         ])
 
         # Get chat history
         history = self.db.get_chat_history(limit=5)
         history_text = "\n".join([
-            f"{msg['role']}: {msg['content']}"
-            for msg in history
+            f"{role}: {content}"
+            for role, content, _ in history
         ])
 
-        prompt = f"""Based on the following information, answer the user's question.
-
-Context from knowledge base:
+        # Fixed instructions first, then documents, then per-turn content
+        prompt = f"""Context from knowledge base:
 {context}
 
 Recent conversation:
 {history_text}
 
 User Question: {user_question}
-
-Provide a helpful and accurate answer based on the context provided.
 """
 
         messages = [
-            {"role": "system", "content": "You are a helpful assistant with access to a knowledge base."},
+            {"role": "system", "content": "You are a helpful assistant with access to a knowledge base. "
+                                          "Based on the information provided, answer the user's question. "
+                                          "Provide a helpful and accurate answer based on the context provided."},
             {"role": "user", "content": prompt}
         ]
 
-        return self.llm.chat(messages, temperature=0.7, max_tokens=500)
+        if on_token is None:
+            answer = self.llm.chat(messages, temperature=0.7, max_tokens=500, slot=LLAMA_RAG_SLOT)
+        else:
+            parts = []
+            for text in self.llm.chat_stream(messages, temperature=0.7, max_tokens=500,
+                                             slot=LLAMA_RAG_SLOT):
+                on_token(text)
+                parts.append(text)
+            answer = "".join(parts)
+        self._semantic_cache_store(query_vec, answer)
+        return answer
 
     def handle_sql_mode(self, user_input: str):
         """Handle SQL query generation and execution (READ-ONLY)"""
@@ -397,44 +710,53 @@ Provide a helpful and accurate answer based on the context provided.
             confirm = prompt("\nExecute this query? (y/n): ").lower()
 
             if confirm == 'y':
-                results = self.db.execute_query(sql_query)
+                columns, rows, total = self.db.execute_user_query(sql_query, SQL_DISPLAY_ROWS)
 
-                if results:
+                if rows:
                     # Display results in a table
-                    if len(results) > 0 and isinstance(results[0], dict):
-                        table = Table(show_header=True)
+                    table = Table(show_header=True)
 
-                        # Add columns
-                        for key in results[0].keys():
-                            table.add_column(str(key))
+                    for column in columns:
+                        table.add_column(column)
 
-                        # Add rows (limit to first 50)
-                        for row in results[:50]:
-                            table.add_row(*[str(v) for v in row.values()])
+                    for row in rows:
+                        table.add_row(*map(str, row))
 
-                        console.print("\n[green]Query Results:[/green]")
-                        console.print(table)
+                    console.print("\n[green]Query Results:[/green]")
+                    console.print(table)
 
-                        if len(results) > 50:
-                            console.print(f"\n[dim]Showing 50 of {len(results)} rows[/dim]")
-                    else:
-                        console.print(f"\n[green]✓ Query executed: {results}[/green]")
+                    if total > len(rows):
+                        console.print(f"\n[dim]Showing {len(rows)} of {total} rows[/dim]")
                 else:
                     console.print("\n[yellow]Query returned no results[/yellow]")
             else:
+                # Let the user ask again for a different query
+                self.forget_sql_query(user_input)
                 console.print("[dim]Query cancelled[/dim]")
 
         except Exception as e:
+            self.forget_sql_query(user_input)
             console.print(f"\n[red]Error: {e}[/red]")
 
     def handle_rag_mode(self, user_input: str):
         """Handle RAG-based question answering"""
         console.print("\n[cyan]Searching knowledge base...[/cyan]")
 
+        streamed = []
+
+        def print_token(text: str):
+            if not streamed:
+                console.print("\n[green]Answer:[/green]")
+            streamed.append(text)
+            console.print(text, end="", markup=False, highlight=False)
+
         try:
-            answer = self.answer_with_rag(user_input)
-            console.print("\n[green]Answer:[/green]")
-            console.print(Markdown(answer))
+            answer = self.answer_with_rag(user_input, on_token=print_token)
+            if streamed:
+                console.print()
+            else:
+                console.print("\n[green]Answer:[/green]")
+                console.print(Markdown(answer))
         except Exception as e:
             console.print(f"\n[red]Error: {e}[/red]")
 
@@ -448,18 +770,21 @@ Provide a helpful and accurate answer based on the context provided.
         ]
 
         # Add history
-        for msg in history:
-            messages.append({"role": msg['role'], "content": msg['content']})
+        for role, content, _ in history:
+            messages.append({"role": role, "content": content})
 
         # Add current message
         messages.append({"role": "user", "content": user_input})
 
         try:
             console.print("\n[cyan]Thinking...[/cyan]")
-            response = self.llm.chat(messages, temperature=0.8, max_tokens=800)
-
             console.print("\n[green]Assistant:[/green]")
-            console.print(Markdown(response))
+            parts = []
+            for text in self.llm.chat_stream(messages, temperature=0.8, max_tokens=800):
+                console.print(text, end="", markup=False, highlight=False)
+                parts.append(text)
+            console.print()
+            response = "".join(parts)
 
             # Save to history
             self.db.save_chat_message("assistant", response)
@@ -475,7 +800,7 @@ Provide a helpful and accurate answer based on the context provided.
 - `/ask <question>` - Ask about policies/info using RAG
 - `/chat <message>` - General conversation
 - `/history` - Show chat history
-- `/schema` - Show database schema
+- `/schema` - Show database schema (`/schema refresh` to reload it)
 - `/help` - Show this help
 - `/quit` or `/exit` - Exit the application
 
@@ -550,11 +875,14 @@ How many products are in stock?
                         else:
                             console.print("[yellow]Usage: /chat <your message>[/yellow]")
                     elif command == "/history":
-                        history = self.db.get_chat_history(limit=20)
+                        history = self.db.get_chat_history(limit=CHAT_HISTORY_WINDOW)
                         console.print("\n[cyan]Recent Chat History:[/cyan]")
-                        for msg in history:
-                            console.print(f"[bold]{msg['role'].title()}:[/bold] {msg['content'][:100]}...")
+                        for role, message, _ in history:
+                            console.print(f"[bold]{role.title()}:[/bold] {message[:100]}...")
                     elif command == "/schema":
+                        if content.lower() == "refresh":
+                            self.db.invalidate_schema_cache()
+                            self._sql_cache.clear()
                         schema = self.db.get_schema_info()
                         console.print(Markdown(f"```\n{schema}\n```"))
                     else:
@@ -565,8 +893,7 @@ How many products are in stock?
                     self.db.save_chat_message("user", user_input)
 
                     # Simple heuristic: if it mentions tables/data/query keywords, use SQL
-                    sql_keywords = ["show", "list", "how many", "count", "total", "find", "get", "customers", "products", "orders"]
-                    if any(keyword in user_input.lower() for keyword in sql_keywords):
+                    if _SQL_HINT_RE.search(user_input):
                         self.handle_sql_mode(user_input)
                     else:
                         self.handle_chat_mode(user_input)
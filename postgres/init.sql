@@ -18,11 +18,15 @@ CREATE TABLE IF NOT EXISTS documents (
     id SERIAL PRIMARY KEY,
     content TEXT NOT NULL,
     metadata JSONB,
-    embedding vector(384),  -- Adjust dimension based on your embedding model
+    embedding halfvec(384),  -- FP16 (pgvector >= 0.7); adjust dimension based on your embedding model
     created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
 );
 
-CREATE INDEX IF NOT EXISTS idx_embedding ON documents USING ivfflat (embedding vector_cosine_ops);
+-- HNSW gives sub-linear nearest-neighbour search (and, unlike ivfflat, does
+-- not need to be built after the table is populated)
+-- Embeddings are stored L2-normalized, so inner product ranks like cosine
+CREATE INDEX IF NOT EXISTS documents_embedding_ip_hnsw ON documents
+    USING hnsw (embedding halfvec_ip_ops) WITH (m = 16, ef_construction = 64);
 
 -- Sample e-commerce schema for demonstration
 
@@ -5,6 +5,8 @@ Demonstrates how an LLM might be tricked into generating write operations
 even with security prompts, and how validation catches them.
 """
 
+from validation import validate_read_only_query
+
 # Simulate potential LLM responses to malicious prompts
 test_cases = [
     {
@@ -58,35 +60,6 @@ test_cases = [
 ]
 
 
-def validate_read_only_query(query: str) -> bool:
-    """
-    Validation function (same as in chat.py)
-    Returns True if valid, raises Exception if not.
-    """
-    clean_query = ' '.join(query.split())
-    clean_query = clean_query.upper().strip()
-    clean_query = clean_query.strip('; ')
-    
-    forbidden_keywords = [
-        'INSERT', 'UPDATE', 'DELETE', 'DROP', 'CREATE', 'ALTER',
-        'TRUNCATE', 'REPLACE', 'MERGE', 'GRANT', 'REVOKE',
-        'EXECUTE', 'EXEC', 'CALL', 'DO'
-    ]
-    
-    for keyword in forbidden_keywords:
-        if keyword in clean_query:
-            raise Exception(f"🛡️ SECURITY: {keyword} operations are not allowed. Read-only mode is enforced.")
-    
-    if not (clean_query.startswith('SELECT') or clean_query.startswith('WITH')):
-        raise Exception("🛡️ SECURITY: Only SELECT queries are allowed in read-only mode.")
-    
-    semicolon_count = query.count(';')
-    if semicolon_count > 1 or (semicolon_count == 1 and not query.strip().endswith(';')):
-        raise Exception("🛡️ SECURITY: Multiple statements or inline semicolons are not allowed.")
-    
-    return True
-
-
 def test_prompt_injection():
     """Test if validation catches LLM-generated malicious SQL"""
     
@@ -4,55 +4,30 @@ Security Test Suite for Read-Only SQL Mode
 Tests SQL injection protection and write operation blocking
 """
 
+import io
 import sys
-from chat import DatabaseManager
+
+from validation import validate_read_only_query
+# Same cases as the standalone suite, reported in this file's style
+from test_validation_only import _TEST_CASES
+
 
 def test_query_validation():
     """Test the query validation logic"""
-    db = DatabaseManager()
+    # Collect all output and write it in one go
+    buf = io.StringIO()
     
-    print("=" * 70)
-    print("SECURITY TEST SUITE - Read-Only SQL Mode")
-    print("=" * 70)
-    print()
-    
-    # Test cases: (query, should_pass, description)
-    test_cases = [
-        # Valid SELECT queries (should pass)
-        ("SELECT * FROM users", True, "Simple SELECT query"),
-        ("SELECT id, name FROM products WHERE price > 100", True, "SELECT with WHERE clause"),
-        ("SELECT COUNT(*) FROM orders", True, "SELECT with aggregate function"),
-        ("WITH cte AS (SELECT * FROM users) SELECT * FROM cte", True, "Common Table Expression (CTE)"),
-        ("SELECT * FROM users;", True, "SELECT with trailing semicolon"),
-        ("  SELECT  *  FROM  users  ", True, "SELECT with extra whitespace"),
-        
-        # Invalid write operations (should fail)
-        ("INSERT INTO users VALUES (1, 'test')", False, "INSERT operation"),
-        ("UPDATE users SET name = 'hacked'", False, "UPDATE operation"),
-        ("DELETE FROM users WHERE id = 1", False, "DELETE operation"),
-        ("DROP TABLE users", False, "DROP TABLE operation"),
-        ("CREATE TABLE hackers (id INT)", False, "CREATE TABLE operation"),
-        ("ALTER TABLE users ADD COLUMN evil TEXT", False, "ALTER TABLE operation"),
-        ("TRUNCATE TABLE users", False, "TRUNCATE operation"),
-        
-        # SQL injection attempts (should fail)
-        ("SELECT * FROM users; DROP TABLE users;", False, "Multi-statement injection"),
-        ("SELECT * FROM users; DELETE FROM users WHERE 1=1;", False, "Stacked queries injection"),
-        ("'; DROP TABLE users; --", False, "Comment-based injection"),
-        
-        # Edge cases
-        ("EXECUTE sp_malicious", False, "EXECUTE stored procedure"),
-        ("CALL malicious_function()", False, "CALL function"),
-        ("GRANT ALL ON users TO hacker", False, "GRANT privileges"),
-        ("REVOKE ALL ON users FROM admin", False, "REVOKE privileges"),
-    ]
+    print("=" * 70, file=buf)
+    print("SECURITY TEST SUITE - Read-Only SQL Mode", file=buf)
+    print("=" * 70, file=buf)
+    print(file=buf)
     
     passed = 0
     failed = 0
     
-    for query, should_pass, description in test_cases:
+    for query, should_pass, description in _TEST_CASES:
         try:
-            db.validate_read_only_query(query)
+            validate_read_only_query(query)
             result = "PASS"
             actual_pass = True
         except Exception as e:
@@ -68,22 +43,24 @@ def test_query_validation():
         else:
             failed += 1
         
-        print(f"{status} [{result:5}] {description}")
-        print(f"   Query: {query[:60]}")
+        print(f"{status} [{result:5}] {description}", file=buf)
+        print(f"   Query: {query[:60]}", file=buf)
         if not actual_pass:
-            print(f"   Reason: {error_msg[:60]}")
-        print()
+            print(f"   Reason: {error_msg[:60]}", file=buf)
+        print(file=buf)
     
-    print("=" * 70)
-    print(f"Test Results: {passed} passed, {failed} failed out of {len(test_cases)} total")
-    print("=" * 70)
+    print("=" * 70, file=buf)
+    print(f"Test Results: {passed} passed, {failed} failed out of {len(_TEST_CASES)} total", file=buf)
+    print("=" * 70, file=buf)
     
     if failed == 0:
-        print("\n✅ ALL TESTS PASSED - Security measures are working correctly!")
-        return 0
+        print("\n✅ ALL TESTS PASSED - Security measures are working correctly!", file=buf)
     else:
-        print(f"\n❌ {failed} TEST(S) FAILED - Review security implementation!")
-        return 1
+        print(f"\n❌ {failed} TEST(S) FAILED - Review security implementation!", file=buf)
+    
+    sys.stdout.write(buf.getvalue())
+    return 0 if failed == 0 else 1
+
 
 if __name__ == "__main__":
     sys.exit(test_query_validation())
@@ -6,9 +6,10 @@ Supports multiple credential sources with fallback chain:
 3. Default values
 """
 
+import logging
 import os
-from typing import Optional
-from dotenv import load_dotenv
+import sys
+from typing import Callable, Dict, Optional
 
 # Try to import keyring (optional dependency)
 try:
@@ -18,11 +19,50 @@ except ImportError:
     KEYRING_AVAILABLE = False
     print("⚠️  keyring not installed. Install with: pip install keyring")
 
-# Load .env file
-load_dotenv()
+# .env is read on the first lookup that falls through to the environment
+_dotenv_loaded = False
 
 SERVICE_NAME = "cgi_chat"
 
+logger = logging.getLogger(__name__)
+
+
+def configure_cli_logging():
+    """
+    Send diagnostics to stderr for the command-line demo.
+    
+    Only warnings are shown by default; set CGI_CHAT_LOG_LEVEL=debug to
+    also see why keyring lookups failed. Command output itself is printed.
+    """
+    level = logging.getLevelName((os.getenv("CGI_CHAT_LOG_LEVEL") or "").strip().upper())
+    logging.basicConfig(
+        level=level if isinstance(level, int) else logging.WARNING,
+        format="%(levelname)s: %(message)s",
+        stream=sys.stderr,
+    )
+
+
+# Keys read from the keyring in one sweep on a loader's first lookup
+KNOWN_KEYS = (
+    "postgres_host",
+    "postgres_port",
+    "postgres_user",
+    "postgres_password",
+    "postgres_db",
+    "llama_api_url",
+    "model_file",
+    "embedding_model",
+)
+
+
+def _ensure_dotenv():
+    """Load the .env file once, on first use"""
+    global _dotenv_loaded
+    if not _dotenv_loaded:
+        from dotenv import load_dotenv
+        load_dotenv()
+        _dotenv_loaded = True
+
 
 class ConfigLoader:
     """Load configuration from multiple sources with fallback"""
@@ -38,6 +78,45 @@ class ConfigLoader:
         self.service_name = service_name
         self.use_keyring = use_keyring and KEYRING_AVAILABLE
         self._cache = {}
+        self._config_cache: Dict[str, dict] = {}
+        # Keys whose keyring value (or absence) is already known
+        self._prefetched_keys: frozenset = frozenset()
+        self._prefetch_pending = self.use_keyring
+        # Canonical keyring (lowercase) and env var (uppercase) names per key
+        self._keyring_name: Dict[str, str] = {}
+        self._env_name: Dict[str, str] = {}
+    
+    def _prefetch_keyring(self):
+        """Read all KNOWN_KEYS from the keyring in one sweep, once"""
+        self._prefetch_pending = False
+        # Only the process environment is consulted: reading .env here would
+        # load the file even when every lookup is served by the keyring
+        if os.environ.get("CGI_CHAT_SKIP_KEYRING_PREFETCH") == "1":
+            return
+        found = {}
+        for key in KNOWN_KEYS:
+            try:
+                value = keyring.get_password(self.service_name, key)
+            except Exception as e:
+                logger.debug("Keyring prefetch failed: %s", e)
+                return  # Keyring failed, fall back to per-key lookups
+            if value:
+                found[key] = value
+        self._cache.update(found)
+        self._prefetched_keys = frozenset(KNOWN_KEYS)
+    
+    def invalidate(self):
+        """Forget cached values so the next lookup re-reads every source"""
+        self._cache.clear()
+        self._config_cache.clear()
+        self._prefetched_keys = frozenset()
+        self._prefetch_pending = self.use_keyring
+    
+    def _memoized(self, name: str, build: Callable[[], dict]) -> dict:
+        """Build a config dict once and return copies of it afterwards"""
+        if name not in self._config_cache:
+            self._config_cache[name] = build()
+        return dict(self._config_cache[name])
     
     def get(self, key: str, default: Optional[str] = None, 
             env_var: Optional[str] = None) -> Optional[str]:
@@ -56,20 +135,35 @@ class ConfigLoader:
         if key in self._cache:
             return self._cache[key]
         
+        if self._prefetch_pending:
+            self._prefetch_keyring()
+            if key in self._cache:
+                return self._cache[key]
+        
         value = None
         
-        # 1. Try keyring first
-        if self.use_keyring:
+        keyring_name = self._keyring_name.get(key)
+        if keyring_name is None:
+            keyring_name = self._keyring_name[key] = key.lower()
+        
+        # 1. Try keyring first (skipped if the prefetch already found nothing)
+        if self.use_keyring and keyring_name not in self._prefetched_keys:
             try:
-                value = keyring.get_password(self.service_name, key.lower())
+                value = keyring.get_password(self.service_name, keyring_name)
                 if value:
                     self._cache[key] = value
                     return value
-            except Exception:
-                pass  # Keyring failed, continue to next source
+            except Exception as e:
+                logger.debug("Keyring lookup for %s failed: %s", keyring_name, e)
+                # Keyring failed, continue to next source
         
         # 2. Try environment variable
-        env_key = env_var or key.upper()
+        env_key = env_var
+        if env_key is None:
+            env_key = self._env_name.get(key)
+            if env_key is None:
+                env_key = self._env_name[key] = key.upper()
+        _ensure_dotenv()
         value = os.getenv(env_key)
         if value:
             self._cache[key] = value
@@ -105,27 +199,27 @@ class ConfigLoader:
         return value
     
     def get_database_config(self):
-        """Get database configuration as dict"""
-        return {
+        """Get database configuration as dict (cached until invalidate())"""
+        return self._memoized("database", lambda: {
             "host": self.get("postgres_host", "localhost", "POSTGRES_HOST"),
             "port": int(self.get("postgres_port", "5432", "POSTGRES_PORT")),
             "user": self.require("postgres_user", "POSTGRES_USER"),
             "password": self.require("postgres_password", "POSTGRES_PASSWORD"),
             "database": self.get("postgres_db", "cgidb", "POSTGRES_DB"),
-        }
+        })
     
     def get_llama_config(self):
-        """Get LLM server configuration"""
-        return {
+        """Get LLM server configuration (cached until invalidate())"""
+        return self._memoized("llama", lambda: {
             "api_url": self.get("llama_api_url", "http://localhost:8080", "LLAMA_API_URL"),
             "model_file": self.get("model_file", env_var="MODEL_FILE"),
-        }
+        })
     
     def get_embedding_config(self):
-        """Get embedding model configuration"""
-        return {
+        """Get embedding model configuration (cached until invalidate())"""
+        return self._memoized("embedding", lambda: {
             "model": self.get("embedding_model", "all-MiniLM-L6-v2", "EMBEDDING_MODEL"),
-        }
+        })
     
     def print_config_sources(self):
         """Print which config sources are being used"""
@@ -155,6 +249,8 @@ def require_config(key: str, env_var: Optional[str] = None) -> str:
 
 # Example usage
 if __name__ == "__main__":
+    configure_cli_logging()
+    
     # Demo the config loader
     print("=" * 70)
     print("CGI Chat - Configuration Loader Demo")
@@ -7,41 +7,19 @@ Stores credentials in system keyring for enhanced security
 import keyring
 import getpass
 import sys
+from collections import namedtuple
 
 SERVICE_NAME = "cgi_chat"
 
-CREDENTIALS = [
-    {
-        "key": "postgres_host",
-        "prompt": "PostgreSQL Host",
-        "default": "localhost",
-        "secret": False
-    },
-    {
-        "key": "postgres_port",
-        "prompt": "PostgreSQL Port",
-        "default": "5432",
-        "secret": False
-    },
-    {
-        "key": "postgres_user",
-        "prompt": "PostgreSQL Username",
-        "default": "cgiuser",
-        "secret": False
-    },
-    {
-        "key": "postgres_password",
-        "prompt": "PostgreSQL Password",
-        "default": None,
-        "secret": True
-    },
-    {
-        "key": "postgres_db",
-        "prompt": "PostgreSQL Database",
-        "default": "cgidb",
-        "secret": False
-    },
-]
+Credential = namedtuple("Credential", "key prompt default secret")
+
+CREDENTIALS = (
+    Credential("postgres_host", "PostgreSQL Host", "localhost", False),
+    Credential("postgres_port", "PostgreSQL Port", "5432", False),
+    Credential("postgres_user", "PostgreSQL Username", "cgiuser", False),
+    Credential("postgres_password", "PostgreSQL Password", None, True),
+    Credential("postgres_db", "PostgreSQL Database", "cgidb", False),
+)
 
 
 def setup_credentials():
@@ -53,12 +31,7 @@ def setup_credentials():
     print(f"Service: {SERVICE_NAME}")
     print("\nPress Enter to use default values shown in [brackets]\n")
     
-    for cred in CREDENTIALS:
-        key = cred["key"]
-        prompt_text = cred["prompt"]
-        default = cred["default"]
-        is_secret = cred["secret"]
-        
+    for key, prompt_text, default, is_secret in CREDENTIALS:
         # Build prompt
         if default:
             full_prompt = f"{prompt_text} [{default}]: "
@@ -105,17 +78,16 @@ def list_credentials():
     print("=" * 70)
     
     for cred in CREDENTIALS:
-        key = cred["key"]
-        value = keyring.get_password(SERVICE_NAME, key)
+        value = keyring.get_password(SERVICE_NAME, cred.key)
         
         if value:
-            if cred["secret"]:
+            if cred.secret:
                 display = "********"
             else:
                 display = value
-            print(f"✓ {cred['prompt']}: {display}")
+            print(f"✓ {cred.prompt}: {display}")
         else:
-            print(f"✗ {cred['prompt']}: Not set")
+            print(f"✗ {cred.prompt}: Not set")
 
 
 def delete_credentials():
@@ -128,10 +100,10 @@ def delete_credentials():
     print("\nDeleting credentials...")
     for cred in CREDENTIALS:
         try:
-            keyring.delete_password(SERVICE_NAME, cred["key"])
-            print(f"✓ Deleted {cred['prompt']}")
+            keyring.delete_password(SERVICE_NAME, cred.key)
+            print(f"✓ Deleted {cred.prompt}")
         except keyring.errors.PasswordDeleteError:
-            print(f"  (not found: {cred['prompt']})")
+            print(f"  (not found: {cred.prompt})")
     
     print("\n✓ All credentials deleted")
 
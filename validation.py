@@ -0,0 +1,67 @@
+"""
+Read-only SQL validation for CGI Chat
+Standalone (no database or LLM dependencies) so it can be imported and
+tested without constructing a DatabaseManager.
+"""
+
+import re
+from functools import lru_cache
+from typing import Optional, Tuple
+
+# Try to import google-re2 (optional dependency): a non-backtracking engine
+# with guaranteed linear-time matching, even on fuzzed or hostile payloads
+try:
+    import re2
+    RE2_AVAILABLE = True
+except ImportError:
+    RE2_AVAILABLE = False
+
+# Write/DDL keywords rejected by the read-only validator (whole words only,
+# e.g. "DO" but not "DOCUMENTS"). Inline (?i) so both engines accept it.
+FORBIDDEN_RE = (re2 if RE2_AVAILABLE else re).compile(
+    r'(?i)\b(?:INSERT|UPDATE|DELETE|DROP|CREATE|ALTER|TRUNCATE|REPLACE|MERGE|'
+    r'GRANT|REVOKE|EXECUTE|EXEC|CALL|DO)\b'
+)
+
+# Queries must start with SELECT or WITH (for CTEs)
+READ_ONLY_PREFIX_RE = re.compile(r'\s*(?:SELECT|WITH)\b', re.IGNORECASE)
+
+# Distinct query strings whose verdicts are remembered (chat sessions tend
+# to re-issue the same handful of queries)
+VALIDATION_CACHE_SIZE = 512
+
+
+@lru_cache(maxsize=VALIDATION_CACHE_SIZE)
+def _check_read_only(query: str) -> Tuple[bool, Optional[str]]:
+    """Return (ok, reason) for a query; reason is the rejection message"""
+    # Ensure query starts with SELECT or WITH (for CTEs). This anchored
+    # check is cheap and rejects most payloads before the full scan below
+    if not READ_ONLY_PREFIX_RE.match(query):
+        return False, "🛡️ SECURITY: Only SELECT queries are allowed in read-only mode."
+    
+    # Block any write operations in a single case-insensitive pass
+    m = FORBIDDEN_RE.search(query)
+    if m:
+        return False, f"🛡️ SECURITY: {m.group(0).upper()} operations are not allowed. Read-only mode is enforced."
+    
+    # Additional check: look for semicolons that might indicate multiple statements
+    # Allow only trailing semicolons, not mid-query ones
+    trimmed = query.rstrip()
+    if trimmed.endswith(';'):
+        trimmed = trimmed[:-1]
+    if ';' in trimmed:
+        return False, "🛡️ SECURITY: Multiple statements or inline semicolons are not allowed."
+    
+    return True, None
+
+
+def validate_read_only_query(query: str) -> bool:
+    """
+    Validate that a query is read-only (SELECT only).
+    Returns True if valid, raises Exception if not.
+    Verdicts are cached per query string; a fresh exception is raised each time.
+    """
+    ok, reason = _check_read_only(query)
+    if not ok:
+        raise Exception(reason)
+    return True